@@ -0,0 +1,38 @@
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; fall back to plain NumPy
+    njit = None
+
+# Per-lane rotation offsets for the 8 parallel quantum states
+ROT_OFFSETS = np.arange(8, dtype=np.uint8)
+
+# These helpers live outside the Streamlit script: the script is re-executed
+# on every interaction, while this module is imported (and jitted) only once
+
+def rotate_lanes(h, out):
+    """Write the 8 rotated lanes of a digest into out (uint8 wraps mod 256)"""
+    np.add(h, ROT_OFFSETS[:, None], out=out, casting='unsafe')
+    return out
+
+def fold_lanes(states):
+    """XOR all lane digests together"""
+    return np.bitwise_xor.reduce(states, axis=0)
+
+if njit is not None:
+    # Compiled loops avoid NumPy's per-ufunc dispatch on these tiny buffers
+    @njit(cache=True)
+    def rotate_lanes(h, out):
+        for i in range(out.shape[0]):
+            for j in range(h.shape[0]):
+                out[i, j] = (h[j] + i) & 0xFF
+        return out
+
+    @njit(cache=True)
+    def fold_lanes(states):
+        out = states[0].copy()
+        for i in range(1, states.shape[0]):
+            for j in range(states.shape[1]):
+                out[j] ^= states[i, j]
+        return out